@@ -1,21 +1,268 @@
 import os
+import sys
+import concurrent.futures
 import argparse
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 import re
 from icalendar import Calendar
-from dateutil import tz
-from typing import Dict, List, Pattern, Tuple
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from typing import Dict, Iterator, List, NamedTuple, Optional, Pattern, Union
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Alignment
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Alignment, Border, Font, Side
 from openpyxl.utils import get_column_letter
 
+_FOLD_RE = re.compile(rb"\r?\n[ \t]")
+_VEVENT_BEGIN_RE = re.compile(rb"(?im)^BEGIN:VEVENT[ \t]*\r?$")
+_VEVENT_END_RE = re.compile(rb"(?im)^END:VEVENT[ \t]*\r?$")
+_PROPERTY_RE = re.compile(r'([^;:]+)((?:;[^";:]*(?:"[^"]*"[^";:]*)*)*):')
+_TEXT_ESCAPE_RE = re.compile(r"\\([\\;,nN])")
+_TEXT_PROPERTIES = {'SUMMARY', 'DESCRIPTION', 'LOCATION'}
+_DATE_PROPERTIES = {'DTSTART', 'DTEND'}
+_MICROSECOND = timedelta(microseconds=1)
+_DAYS_PER_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_WORD_RE = re.compile(r"[A-Za-zА-Яа-я0-9]{3,}")
+_LEADING_FLAGS_RE = re.compile(r"^\(\?[aiLmsux]+\)")
+_BACKREFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+_END_ANCHOR_RE = re.compile(r"(?<!\\)(?:\\\\)*(?:\$|\\Z)")
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+def _unescape_text(value: str) -> str:
+    return _TEXT_ESCAPE_RE.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+@lru_cache(maxsize=None)
+def _zone(tzid: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        return None
+
+
+def _parse_ical_date(value: str, params: str):
+    value = value.strip()
+    if len(value) == 8:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    parsed = datetime(
+        int(value[:4]), int(value[4:6]), int(value[6:8]),
+        int(value[9:11]), int(value[11:13]), int(value[13:15]),
+    )
+    if value.endswith('Z'):
+        return parsed.replace(tzinfo=timezone.utc)
+    for param in params.split(';'):
+        if param.upper().startswith('TZID='):
+            # Unknown TZIDs (e.g. Windows zone names) stay floating
+            return parsed.replace(tzinfo=_zone(param[5:].strip('"')))
+    return parsed
+
+
+def _parse_vevent(lines: List[str]) -> Dict[str, Union[str, date, datetime]]:
+    event = {}
+    nested = 0
+    for line in lines:
+        line = line.rstrip('\r')
+        keyword = line[:6].upper()
+        if keyword == 'BEGIN:':
+            nested += 1
+            continue
+        if keyword.startswith('END:'):
+            nested -= 1
+            continue
+        if nested:
+            continue
+
+        match = _PROPERTY_RE.match(line)
+        if match is None:
+            continue
+        name = match.group(1).upper()
+        value = line[match.end():]
+        if name in _TEXT_PROPERTIES:
+            event[name.lower()] = _unescape_text(value)
+        elif name in _DATE_PROPERTIES:
+            try:
+                event[name.lower()] = _parse_ical_date(value, match.group(2))
+            except ValueError:
+                continue
+    return event
+
+
+def iter_vevents(path: str) -> Iterator[Dict[str, Union[str, date, datetime]]]:
+    """Yield the DTSTART, DTEND, SUMMARY, DESCRIPTION and LOCATION of each VEVENT in an .ics file.
+
+    Keys are lower-cased property names; properties missing from an event are omitted.
+    """
+    with open(path, 'rb') as f:
+        data = _FOLD_RE.sub(b'', f.read())
+
+    # Jump straight between VEVENT blocks so VTIMEZONE and other components are never decoded
+    pos = 0
+    while (begin := _VEVENT_BEGIN_RE.search(data, pos)) is not None:
+        end = _VEVENT_END_RE.search(data, begin.end())
+        if end is None:
+            break
+        lines = data[begin.end():end.start()].decode('utf-8', 'replace').split('\n')
+        yield _parse_vevent(lines)
+        pos = end.end()
+
+
+def _aware_datetime(value: Union[date, datetime], local_tz) -> datetime:
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day, tzinfo=local_tz)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _days_in_month(year: int, month: int) -> int:
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_PER_MONTH[month - 1]
+
+
+def _bucket_totals(df: pd.DataFrame, key: str):
+    """Yield (pattern, key, event count, total hours) for every non-empty bucket, sorted by pattern and key."""
+    keys = df[key].to_numpy()
+    if not len(keys):
+        return
+    offset = keys.min()
+    span = keys.max() - offset + 1
+    codes = df['pattern'].cat.codes.to_numpy().astype('i8')
+    buckets, inverse = np.unique(codes * span + (keys - offset), return_inverse=True)
+    counts = np.bincount(inverse)
+    totals = np.bincount(inverse, weights=df['hours'].to_numpy())
+    names = df['pattern'].cat.categories[buckets // span]
+    yield from zip(names, (buckets % span + offset).tolist(), counts.tolist(), totals.tolist())
+
+
+def _daily_hours(df: pd.DataFrame, days: List[date]) -> List[List[Optional[float]]]:
+    """Return each pattern's hours on each of the consecutive local days, rounded to 0.1; None where there were none."""
+    if not days:
+        return [[] for _ in df['pattern'].cat.categories]
+    first = (days[0] - date(1970, 1, 1)).days
+    offsets = df['day'].to_numpy() - first
+    in_range = (offsets >= 0) & (offsets < len(days))
+    index = df['pattern'].cat.codes.to_numpy().astype('i8')[in_range] * len(days) + offsets[in_range]
+    size = len(df['pattern'].cat.categories) * len(days)
+    totals = np.bincount(index, weights=df['hours'].to_numpy()[in_range], minlength=size).reshape(-1, len(days))
+    # Python's round, not numpy's: numpy scales by 10 first, so 0.05 h becomes 0.0 and 0.35 h becomes 0.4
+    return [[round(total, 1) if total > 0 else None for total in row] for row in totals.tolist()]
+
+
+class MatchedEvent(NamedTuple):
+    start: datetime
+    summary: str
+    duration: timedelta
+
+
+class PatternMatcher:
+    """Match text against all patterns at once, using a multi-pattern engine when installed."""
+
+    def __init__(self, patterns: Dict[str, Pattern]):
+        self.names = list(patterns)
+        self.regexes = list(patterns.values())
+        self._db = None
+        self._re2_set = None
+        self._combined = None
+        # RE2's $ does not match before a trailing newline and Hyperscan's \Z does, unlike re
+        accelerated = all(
+            not r.flags & ~(re.IGNORECASE | re.UNICODE) and not _END_ANCHOR_RE.search(r.pattern)
+            for r in self.regexes
+        )
+        if self.regexes and accelerated and hyperscan is not None:
+            self._db = self._compile_hyperscan()
+        if self.regexes and accelerated and self._db is None and re2 is not None:
+            self._re2_set = self._compile_re2()
+        if self.regexes and accelerated and self._db is None and self._re2_set is None:
+            self._combined = self._compile_combined()
+
+    def _compile_hyperscan(self):
+        base = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        flags = [
+            base | hyperscan.HS_FLAG_CASELESS if r.flags & re.IGNORECASE else base
+            for r in self.regexes
+        ]
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[r.pattern.encode('utf-8') for r in self.regexes],
+                ids=list(range(len(self.regexes))),
+                elements=len(self.regexes),
+                flags=flags,
+            )
+        except hyperscan.error:
+            return None
+        self._scratch = hyperscan.Scratch(db)
+        return db
+
+    def _compile_re2(self):
+        pattern_set = re2.Set.SearchSet(re2.Options())
+        try:
+            for r in self.regexes:
+                pattern_set.Add(f"(?i){r.pattern}" if r.flags & re.IGNORECASE else r.pattern)
+            pattern_set.Compile()
+        except re2.error:
+            return None
+        return pattern_set
+
+    def _compile_combined(self):
+        # Group numbers shift once the patterns are joined, so backreferences can't be combined
+        if any(_BACKREFERENCE_RE.search(r.pattern) for r in self.regexes):
+            return None
+        alternatives = [
+            f"(?{'i' if r.flags & re.IGNORECASE else ''}:{_LEADING_FLAGS_RE.sub('', r.pattern)})"
+            for r in self.regexes
+        ]
+        try:
+            return re.compile("|".join(alternatives))
+        except re.error:
+            return None
+
+    def match(self, *texts: str) -> List[str]:
+        """Return the names of the patterns found in any of the given texts."""
+        if self._db is not None:
+            matched_ids = set()
+            for text in texts:
+                self._db.scan(
+                    text.encode('utf-8'),
+                    match_event_handler=lambda pattern_id, *_: matched_ids.add(pattern_id),
+                    scratch=self._scratch,
+                )
+                if len(matched_ids) == len(self.names):
+                    break
+            return [self.names[i] for i in sorted(matched_ids)]
+        if self._re2_set is not None:
+            matched_ids = set()
+            for text in texts:
+                matched_ids.update(self._re2_set.Match(text) or ())
+            return [self.names[i] for i in sorted(matched_ids)]
+        if self._combined is not None:
+            texts = [text for text in texts if self._combined.search(text)]
+        return [
+            name for name, regex in zip(self.names, self.regexes)
+            if any(regex.search(text) for text in texts)
+        ]
+
 
 class CalendarAnalyzer:
     def __init__(self, calendar_files: List[str]):
         self.calendar_files = [os.path.join(os.getcwd(), f) for f in calendar_files]
-        self.local_tz = tz.gettz('America/Los_Angeles')
+        self.local_tz = ZoneInfo('America/Los_Angeles')
         self._calendars = None
+        self._vevents = None
+        self.unmatched_events: List[MatchedEvent] = []
 
     @property
     def calendars(self) -> List[Calendar]:
@@ -27,69 +274,109 @@ class CalendarAnalyzer:
         with open(path, 'rb') as f:
             return Calendar.from_ical(f.read())
 
+    @staticmethod
+    def _parse_one(path: str) -> List[Dict[str, Union[str, date, datetime]]]:
+        return list(iter_vevents(path))
+
+    @property
+    def vevents(self) -> List[List[Dict[str, Union[str, date, datetime]]]]:
+        if self._vevents is None:
+            if len(self.calendar_files) <= 1:
+                self._vevents = [self._parse_one(path) for path in self.calendar_files]
+            else:
+                max_workers = min(len(self.calendar_files), os.cpu_count() or 1)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    self._vevents = list(executor.map(CalendarAnalyzer._parse_one, self.calendar_files))
+        return self._vevents
+
     def analyze_events(
         self,
         start_time: datetime,
         end_time: datetime,
         patterns: Dict[str, Pattern]
-    ) -> Dict[str, List[Tuple[datetime, str, timedelta]]]:
+    ) -> Dict[str, List[MatchedEvent]]:
         events_data = {pattern_name: [] for pattern_name in patterns}
         unmatched_events = []
-
-        for cal in self.calendars:
-            for component in cal.walk():
-                if component.name != "VEVENT":
-                    continue
-
-                dtstart = component.get('dtstart')
-                if not dtstart:
+        matcher = PatternMatcher(patterns)
+        local_tz = self.local_tz
+        start_ts = start_time.timestamp()
+        end_ts = end_time.timestamp()
+
+        for events in self.vevents:
+            for vevent in events:
+                event_start = vevent.get('dtstart')
+                if event_start is None:
                     continue
-                event_start = dtstart.dt
-
-                dtend = component.get('dtend')
-                if not dtend:
-                    event_end = event_start + timedelta(hours=1)
-                else:
-                    event_end = dtend.dt
 
+                # Floating times are treated as UTC; all-day dates start at local midnight
                 is_all_day = not isinstance(event_start, datetime)
-                if isinstance(event_start, datetime):
-                    event_start = event_start.replace(tzinfo=timezone.utc).astimezone(self.local_tz)
-                else:
-                    event_start = datetime.combine(event_start, datetime.min.time(), tzinfo=self.local_tz)
+                event_start = _aware_datetime(event_start, local_tz)
+                if event_start.timestamp() > end_ts:
+                    continue
 
-                if isinstance(event_end, datetime):
-                    event_end = event_end.replace(tzinfo=timezone.utc).astimezone(self.local_tz)
+                event_end = vevent.get('dtend')
+                if event_end is None:
+                    event_end = event_start if is_all_day else event_start.astimezone(timezone.utc) + timedelta(hours=1)
                 else:
-                    event_end = datetime.combine(event_end, datetime.min.time(), tzinfo=self.local_tz)
-
-                if event_end < start_time or event_start > end_time:
+                    event_end = _aware_datetime(event_end, local_tz)
+                if event_end.timestamp() < start_ts:
                     continue
 
-                duration = timedelta(0) if is_all_day else (event_end - event_start)
+                # Datetimes sharing a tzinfo subtract as wall-clock time, so measure in UTC
+                if is_all_day:
+                    duration = timedelta(0)
+                else:
+                    duration = event_end.astimezone(timezone.utc) - event_start.astimezone(timezone.utc)
+                event_start = event_start.astimezone(local_tz)
 
-                summary = str(component.get('summary', ''))
-                description = str(component.get('description', ''))
-                location = str(component.get('location', ''))
-                searchable_text = f"{summary} {description} {location}"
+                summary = vevent.get('summary', '')
+                description = vevent.get('description', '')
+                location = vevent.get('location', '')
 
-                matched = False
-                for pattern_name, regex in patterns.items():
-                    if regex.search(searchable_text):
-                        events_data[pattern_name].append((event_start, summary, duration))
-                        matched = True
+                matched = matcher.match(summary, description, location)
+                event = MatchedEvent(event_start, summary, duration)
+                for pattern_name in matched:
+                    events_data[pattern_name].append(event)
 
                 if not matched:
-                    unmatched_events.append((event_start, summary, duration))
-
-        if unmatched_events:
-            print("\nEvents that did not fit the patterns:")
-            for start, summ, dur in unmatched_events:
-                print(f"{start.strftime('%Y-%m-%d %H:%M')} | {summ} | {dur}")
+                    unmatched_events.append(event)
 
+        self.unmatched_events = unmatched_events
         return events_data
 
-    def get_day_stats(self, events_data):
+    def format_unmatched_events(self) -> str:
+        if not self.unmatched_events:
+            return ""
+        lines = ["", "Events that did not fit the patterns:"]
+        lines.extend(
+            f"{event.start.strftime('%Y-%m-%d %H:%M')} | {event.summary} | {event.duration}"
+            for event in self.unmatched_events
+        )
+        return "\n".join(lines) + "\n"
+
+    def events_frame(self, events_data) -> pd.DataFrame:
+        # Callers running several stats over one result can build this once and pass it to each of them.
+        # Events are read by position so plain (start, summary, duration) tuples work too
+        sizes = [len(pattern_events) for pattern_events in events_data.values()]
+        names = list(events_data)
+        events = [event for pattern_events in events_data.values() for event in pattern_events]
+        codes = np.repeat(np.arange(len(names)), sizes)
+        starts = pd.to_datetime([event[0] for event in events], utc=True).tz_convert(self.local_tz).tz_localize(None).values
+        durations = np.fromiter((event[2] // _MICROSECOND for event in events), dtype='i8', count=len(events))
+        # Integer keys: days since the epoch, the Monday of that week, and months since year 0
+        day = starts.astype('datetime64[D]').astype('i8')
+        weekday = (day + 3) % 7
+        frame = pd.DataFrame({
+            'pattern': pd.Categorical.from_codes(codes, categories=names),
+            'hours': durations / 1e6 / 3600,
+            'day': day,
+            'weekday': weekday,
+            'week': day - weekday,
+            'month': starts.astype('datetime64[M]').astype('i8') + 1970 * 12,
+        })
+        return frame
+
+    def get_day_stats(self, events_data, frame: Optional[pd.DataFrame] = None):
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         distribution = {
             pattern: {
@@ -98,20 +385,19 @@ class CalendarAnalyzer:
             }
             for pattern in events_data
         }
-        for pattern, events in events_data.items():
-            for event_start, _, duration in events:
-                day = days[event_start.weekday()]
-                hours = duration.total_seconds() / 3600
-                distribution[pattern][day]['count'] += 1
-                distribution[pattern][day]['total_hours'] += hours
-
-        for pattern in distribution:
-            for day in days:
-                count = distribution[pattern][day]['count']
+        df = self.events_frame(events_data) if frame is None else frame
+        index = df['pattern'].cat.codes.to_numpy().astype('i8') * 7 + df['weekday'].to_numpy()
+        size = len(distribution) * 7
+        counts = np.bincount(index, minlength=size).reshape(-1, 7)
+        totals = np.bincount(index, weights=df['hours'].to_numpy(), minlength=size).reshape(-1, 7)
+        for pattern, pattern_counts, pattern_totals in zip(distribution, counts, totals):
+            for day, count, total in zip(days, pattern_counts, pattern_totals):
                 if count > 0:
-                    distribution[pattern][day]['avg_hours'] = (
-                        distribution[pattern][day]['total_hours'] / count
-                    )
+                    distribution[pattern][day] = {
+                        'count': int(count),
+                        'total_hours': float(total),
+                        'avg_hours': float(total / count),
+                    }
 
         return distribution
 
@@ -121,44 +407,42 @@ class CalendarAnalyzer:
             for pattern, events in events_data.items()
         }
 
-    def get_weekly_stats(self, events_data):
-        weekly_stats = {}
-        for pattern, events in events_data.items():
-            weekly_stats[pattern] = {}
-            for event_start, _, duration in events:
-                monday = event_start - timedelta(days=event_start.weekday())
-                week_key = monday.strftime('%Y-%m-%d')
-                if week_key not in weekly_stats[pattern]:
-                    weekly_stats[pattern][week_key] = {'total_hours': 0.0, 'avg_hours': 0.0}
-                weekly_stats[pattern][week_key]['total_hours'] += duration.total_seconds() / 3600
-
-            for week in weekly_stats[pattern].values():
-                week['avg_hours'] = week['total_hours'] / 7
+    def get_weekly_stats(self, events_data, frame: Optional[pd.DataFrame] = None):
+        weekly_stats = {pattern: {} for pattern in events_data}
+        df = self.events_frame(events_data) if frame is None else frame
+        for pattern, week_start, _, total in _bucket_totals(df, 'week'):
+            weekly_stats[pattern][str(np.datetime64(week_start, 'D'))] = {
+                'total_hours': total,
+                'avg_hours': total / 7,
+            }
         return weekly_stats
 
-    def get_monthly_stats(self, events_data):
-        monthly_stats = {}
-        for pattern, events in events_data.items():
-            monthly_stats[pattern] = {}
-            for event_start, _, duration in events:
-                month_key = event_start.strftime('%Y-%m')
-                if month_key not in monthly_stats[pattern]:
-                    monthly_stats[pattern][month_key] = {'total_hours': 0.0, 'avg_hours': 0.0, 'event_count': 0}
-                monthly_stats[pattern][month_key]['total_hours'] += duration.total_seconds() / 3600
-                monthly_stats[pattern][month_key]['event_count'] += 1
-
-            for month_key, stats in monthly_stats[pattern].items():
-                year, month = map(int, month_key.split('-'))
-                if month == 12:
-                    next_month = datetime(year + 1, 1, 1)
-                else:
-                    next_month = datetime(year, month + 1, 1)
-                days_in_month = (next_month - datetime(year, month, 1)).days
-                weeks_in_month = days_in_month / 7.0
-                stats['avg_hours'] = stats['total_hours'] / weeks_in_month
+    def get_monthly_stats(self, events_data, frame: Optional[pd.DataFrame] = None):
+        monthly_stats = {pattern: {} for pattern in events_data}
+        df = self.events_frame(events_data) if frame is None else frame
+        for pattern, month_idx, count, total in _bucket_totals(df, 'month'):
+            year, month = divmod(month_idx, 12)
+            weeks_in_month = _days_in_month(year, month + 1) / 7.0
+            monthly_stats[pattern][f"{year:04d}-{month + 1:02d}"] = {
+                'total_hours': total,
+                'avg_hours': total / weeks_in_month,
+                'event_count': count,
+            }
         return monthly_stats
 
 
+_compiled_patterns: Dict[str, Pattern] = {}
+
+
+def _compile_pattern(regex: str) -> Pattern:
+    # Patterns are always case-insensitive, so a leading (?i) is redundant
+    regex = regex.removeprefix("(?i)")
+    compiled = _compiled_patterns.get(regex)
+    if compiled is None:
+        compiled = _compiled_patterns[regex] = re.compile(regex, re.IGNORECASE)
+    return compiled
+
+
 def load_or_generate_patterns(ics_files, patterns_file="patterns.txt"):
     if os.path.exists(patterns_file):
         print(f"Loading patterns from {patterns_file}...")
@@ -169,31 +453,24 @@ def load_or_generate_patterns(ics_files, patterns_file="patterns.txt"):
                 if not line or ":" not in line:
                     continue
                 name, regex = line.split(":", 1)
-                patterns[name.strip()] = re.compile(regex.strip(), re.IGNORECASE)
+                patterns[name.strip()] = _compile_pattern(regex.strip())
         return patterns
 
     print(f"{patterns_file} not found. Generated automatically...")
     keywords = set()
 
     for file_path in ics_files:
-        with open(file_path, "rb") as f:
-            cal = Calendar.from_ical(f.read())
-        for component in cal.walk():
-            if component.name != "VEVENT":
-                continue
+        for event in iter_vevents(file_path):
             text_parts = [
-                str(component.get("summary", "")),
-                str(component.get("description", "")),
-                str(component.get("location", "")),
+                event.get("summary", ""),
+                event.get("description", ""),
+                event.get("location", ""),
             ]
             text = " ".join(text_parts)
-            words = re.findall(r"[A-Za-zА-Яа-я0-9]{3,}", text)
-            for w in words:
-                keywords.add(w.lower())
+            keywords.update(map(str.lower, _WORD_RE.findall(text)))
 
     with open(patterns_file, "w", encoding="utf-8") as f:
-        for word in sorted(keywords):
-            f.write(f"{word}:(?i){word}\n")
+        f.writelines(f"{word}:{word}\n" for word in sorted(keywords))
 
     print(f"Generated {patterns_file}. Edit it and run the script again.")
     return {}
@@ -211,8 +488,8 @@ def parse_args():
 if __name__ == '__main__':
     args = parse_args()
 
-    start_time = datetime.strptime(args.start, "%Y-%m-%d").replace(tzinfo=tz.gettz('America/Los_Angeles'))
-    end_time = datetime.strptime(args.end, "%Y-%m-%d").replace(hour=23, minute=59, second=59, tzinfo=tz.gettz('America/Los_Angeles'))
+    start_time = datetime.strptime(args.start, "%Y-%m-%d").replace(tzinfo=ZoneInfo('America/Los_Angeles'))
+    end_time = datetime.strptime(args.end, "%Y-%m-%d").replace(hour=23, minute=59, second=59, tzinfo=ZoneInfo('America/Los_Angeles'))
 
     patterns = load_or_generate_patterns(args.files)
     if not patterns:
@@ -220,11 +497,13 @@ if __name__ == '__main__':
 
     analyzer = CalendarAnalyzer(args.files)
     results = analyzer.analyze_events(start_time, end_time, patterns)
+    sys.stdout.write(analyzer.format_unmatched_events())
 
-    day_dist = analyzer.get_day_stats(results)
+    events_df = analyzer.events_frame(results)
+    day_dist = analyzer.get_day_stats(results, events_df)
     time_spent = analyzer.get_time_spent(results)
-    weekly_stats = analyzer.get_weekly_stats(results)
-    monthly_stats = analyzer.get_monthly_stats(results)
+    weekly_stats = analyzer.get_weekly_stats(results, events_df)
+    monthly_stats = analyzer.get_monthly_stats(results, events_df)
 
     print("\nEvent Distribution by Day:")
     for pattern, dist in day_dist.items():
@@ -252,47 +531,52 @@ if __name__ == '__main__':
     date_list = [start_time + timedelta(days=i) for i in range((end_time - start_time).days + 1)]
     date_str_list = [f"{d.day}-{d.month}-{d.year}" for d in date_list]
 
-    df_data = {}
-    for pattern in patterns.keys():
-        hours_by_day = []
-        for day in date_list:
-            total_hours = sum(
-                (duration.total_seconds() / 3600)
-                for event_start, _, duration in results[pattern]
-                if event_start.date() == day.date()
-            )
-            hours_by_day.append(round(total_hours, 1) if total_hours > 0 else None)
-        df_data[pattern] = hours_by_day
-
-    df = pd.DataFrame(df_data, index=date_str_list).T
+    df = pd.DataFrame(
+        _daily_hours(events_df, [d.date() for d in date_list]),
+        index=list(patterns),
+        columns=date_str_list,
+    )
     df.index.name = "Date / Regex pattern"
-    df = df.fillna("-")
+    df = df.astype(object).fillna("-")
 
     excel_path = args.output
-    df.to_excel(excel_path)
-
-    wb = load_workbook(excel_path)
-    ws = wb.active
 
     fill_blue = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
     fill_green = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
     fill_red = PatternFill(start_color="FCE4D6", end_color="FCE4D6", fill_type="solid")
-
-    for col in range(2, ws.max_column + 1):
-        ws.cell(row=1, column=col).fill = fill_green
-
-    for row in range(2, ws.max_row + 1):
-        ws.cell(row=row, column=1).fill = fill_blue
-
-    for row in range(2, ws.max_row + 1):
-        for col in range(2, ws.max_column + 1):
-            ws.cell(row=row, column=col).fill = fill_red
-            ws.cell(row=row, column=col).alignment = Alignment(horizontal="center", vertical="center")
-
+    center = Alignment(horizontal="center", vertical="center")
+    # The header and index styling pandas to_excel applied before this sheet was written by hand
+    header_font = Font(bold=True)
+    thin = Side(style="thin")
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_alignment = Alignment(horizontal="center", vertical="top")
+
+    # Write-only mode streams rows straight to the file; layout must be set before the first row
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
     ws.freeze_panes = "B2"
-
-    for col in range(1, ws.max_column + 1):
+    for col in range(1, len(df.columns) + 2):
         ws.column_dimensions[get_column_letter(col)].width = 15
 
+    def header_cell(value, fill=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = header_font
+        cell.border = header_border
+        cell.alignment = header_alignment
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
+    ws.append([header_cell(df.index.name)] + [header_cell(value, fill_green) for value in df.columns])
+
+    for pattern, *hours in df.itertuples(name=None):
+        row = [header_cell(pattern, fill_blue)]
+        for value in hours:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.fill = fill_red
+            cell.alignment = center
+            row.append(cell)
+        ws.append(row)
+
     wb.save(excel_path)
     print(f"\nExcel file saved as {excel_path}")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
 from datetime import datetime
 import re
 from dateutil import parser, tz
@@ -88,6 +89,7 @@ def main():
     try:
         # Analyze events
         results = analyzer.analyze_events(args.start, args.end, patterns)
+        sys.stdout.write(analyzer.format_unmatched_events())
 
         # Print basic results
         print(f"\nAnalyzing events from {args.start.strftime('%Y-%m-%d')} to {args.end.strftime('%Y-%m-%d')}")
@@ -108,7 +110,8 @@ def main():
         # Always show all analyses
 
         # Day statistics
-        distribution = analyzer.get_day_stats(results)
+        events_df = analyzer.events_frame(results)
+        distribution = analyzer.get_day_stats(results, events_df)
         print("\nEvent Distribution by Day:")
         for pattern_name, dist in distribution.items():
             print(f"\n{pattern_name.title()}:")
@@ -119,7 +122,7 @@ def main():
                 print(f"  {day:9} - {count:2d} events, {total:5.1f} hours total ({avg:4.1f}h avg/event)")
 
         # Monthly statistics
-        monthly_stats = analyzer.get_monthly_stats(results)
+        monthly_stats = analyzer.get_monthly_stats(results, events_df)
         print("\nMonthly Statistics:")
         for pattern_name, stats in monthly_stats.items():
             print(f"\n{pattern_name.title()}:")
@@ -128,7 +131,7 @@ def main():
                       f"({month_stats['avg_hours']:.1f}h avg/week), {month_stats['event_count']} events")
 
         # Weekly statistics
-        weekly_stats = analyzer.get_weekly_stats(results)
+        weekly_stats = analyzer.get_weekly_stats(results, events_df)
         print("\nWeekly Statistics:")
         for pattern_name, stats in weekly_stats.items():
             print(f"\n{pattern_name.title()}:")
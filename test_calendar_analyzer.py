@@ -1,12 +1,16 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 import re
-from calendar_analyzer import CalendarAnalyzer
+import calendar_analyzer
+from calendar_analyzer import CalendarAnalyzer, PatternMatcher, iter_vevents, load_or_generate_patterns, _days_in_month, _daily_hours
 from dateutil import tz
 import random
 from icalendar import Calendar, Event
 import os
 import tempfile
+import calendar
+import types
 
 def create_sample_calendar(num_events=15):
     """Create a sample calendar with random events."""
@@ -67,7 +71,7 @@ def sample_calendar_file(tmp_path):
 
 @pytest.fixture
 def analyzer(sample_calendar_file):
-    return CalendarAnalyzer(str(sample_calendar_file))
+    return CalendarAnalyzer([str(sample_calendar_file)])
 
 @pytest.fixture
 def sample_patterns():
@@ -88,11 +92,11 @@ def timeframe():
     )
 
 def test_analyzer_initialization(analyzer, sample_calendar_file):
-    assert os.path.exists(analyzer.calendar_file)
+    assert os.path.exists(analyzer.calendar_files[0])
     assert analyzer.local_tz is not None
 
 def test_calendar_loading(analyzer):
-    cal = analyzer.calendar
+    cal = analyzer.calendars[0]
     assert isinstance(cal, Calendar)
     assert len(list(cal.walk('VEVENT'))) > 0
 
@@ -192,7 +196,7 @@ def test_all_day_events(analyzer, timeframe):
         temp_file = f.name
 
     # Create analyzer with our test calendar
-    test_analyzer = CalendarAnalyzer(temp_file)
+    test_analyzer = CalendarAnalyzer([temp_file])
 
     # Define a pattern that will match our event
     patterns = {'meetings': re.compile(r'meeting', re.IGNORECASE)}
@@ -260,3 +264,400 @@ def test_monthly_stats(analyzer, sample_patterns, timeframe):
         for month, month_stats in sorted(stats.items()):
             print(f"  Month of {month}: {month_stats['total_hours']:.1f} total hours "
                   f"({month_stats['avg_hours']:.1f}h avg/day), {month_stats['event_count']} events")
+
+def test_pattern_matcher(sample_patterns):
+    """Test that every matching pattern is reported, in pattern order."""
+    matcher = PatternMatcher(sample_patterns)
+    assert matcher.match("Lunch meeting about CSE 6040") == ['classes', 'meetings', 'social']
+    assert matcher.match("Dentist") == []
+    assert matcher.match("Dentist", "", "Coffee shop") == ['social']
+
+    # Patterns a multi-pattern engine cannot compile fall back to re
+    fallback = PatternMatcher({'repeat': re.compile(r'(\w)\1', re.IGNORECASE)})
+    assert fallback._db is None and fallback._re2_set is None
+    assert fallback.match("coffee") == ['repeat']
+    assert fallback.match("tea") == []
+
+    # Unescaped end anchors keep re's trailing-newline semantics
+    anchored = PatternMatcher({'lunch': re.compile(r'lunch$', re.IGNORECASE)})
+    assert anchored._db is None and anchored._re2_set is None
+    assert anchored.match("Team lunch\n") == ['lunch']
+    assert PatternMatcher({'price': re.compile(r'\$5', re.IGNORECASE)}).match("Lunch for $5") == ['price']
+
+
+class FakeHyperscanDatabase:
+    """Stand-in for hyperscan.Database that scans with the re module."""
+
+    def compile(self, expressions, ids, elements, flags):
+        assert len(expressions) == len(ids) == len(flags) == elements
+        if any(b'\\1' in expression for expression in expressions):
+            raise re.error("Back-references are unsupported.")
+        self.regexes = [
+            (pattern_id, re.compile(expression.decode('utf-8'), re.IGNORECASE if flag & 1 else 0))
+            for expression, pattern_id, flag in zip(expressions, ids, flags)
+        ]
+
+    def scan(self, data, match_event_handler, scratch):
+        assert scratch.db is self
+        text = data.decode('utf-8')
+        for pattern_id, regex in self.regexes:
+            match = regex.search(text)
+            if match:
+                match_event_handler(pattern_id, match.start(), match.end(), 0, None)
+
+
+class FakeHyperscanScratch:
+    def __init__(self, db):
+        self.db = db
+
+
+class FakeRe2Set:
+    """Stand-in for re2.Set that, like google-re2, returns None when nothing matches."""
+
+    def __init__(self):
+        self.regexes = []
+
+    @classmethod
+    def SearchSet(cls, options):
+        return cls()
+
+    def Add(self, pattern):
+        if '\\1' in pattern:
+            raise re.error("backreferences are unsupported")
+        self.regexes.append(re.compile(pattern))
+
+    def Compile(self):
+        pass
+
+    def Match(self, text):
+        return [i for i, regex in enumerate(self.regexes) if regex.search(text)] or None
+
+
+fake_hyperscan = types.SimpleNamespace(
+    Database=FakeHyperscanDatabase,
+    Scratch=FakeHyperscanScratch,
+    error=re.error,
+    HS_FLAG_CASELESS=1,
+    HS_FLAG_SINGLEMATCH=2,
+    HS_FLAG_UTF8=4,
+    HS_FLAG_UCP=8,
+)
+fake_re2 = types.SimpleNamespace(Set=FakeRe2Set, Options=lambda: None, error=re.error)
+
+
+@pytest.mark.parametrize('engine', ['hyperscan', 're2'])
+def test_pattern_matcher_engines(monkeypatch, sample_patterns, engine):
+    """Test the multi-pattern engine paths against the re fallback."""
+    monkeypatch.setattr(calendar_analyzer, 'hyperscan', fake_hyperscan if engine == 'hyperscan' else None)
+    monkeypatch.setattr(calendar_analyzer, 're2', fake_re2 if engine == 're2' else None)
+
+    matcher = PatternMatcher(sample_patterns)
+    assert (matcher._db is not None) == (engine == 'hyperscan')
+    assert (matcher._re2_set is not None) == (engine == 're2')
+    assert matcher.match("Lunch meeting about CSE 6040") == ['classes', 'meetings', 'social']
+    assert matcher.match("Dentist") == []
+
+    case_sensitive = PatternMatcher({'upper': re.compile('CSE'), 'any': re.compile('cse', re.IGNORECASE)})
+    assert case_sensitive.match("cse 6040") == ['any']
+
+    fallback = PatternMatcher({'repeat': re.compile(r'(\w)\1', re.IGNORECASE)})
+    assert fallback._db is None and fallback._re2_set is None
+    assert fallback.match("coffee") == ['repeat']
+
+    anchored = PatternMatcher({'end': re.compile(r'lunch\Z', re.IGNORECASE), 'any': re.compile('CSE')})
+    assert anchored._db is None and anchored._re2_set is None
+    assert anchored.match("Lunch\n") == [] and anchored.match("CSE lunch") == ['end', 'any']
+
+    literal = PatternMatcher({'price': re.compile(r'\$5', re.IGNORECASE)})
+    assert literal._db is not None or literal._re2_set is not None
+    assert literal.match("Lunch for $5") == ['price']
+
+def test_iter_vevents(tmp_path):
+    """Test that VEVENT fields are unfolded, unescaped and parsed, skipping nested components."""
+    ics = (
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VTIMEZONE\r\nTZID:America/New_York\r\nEND:VTIMEZONE\r\n"
+        "BEGIN:VEVENT\r\n"
+        "SUMMARY:Team Meeting\\, weekly\r\n"
+        "DESCRIPTION;ALTREP=\"cid:notes\":Agenda\\nfirst item and a long\r\n"
+        "  folded line\r\n"
+        "DTSTART;TZID=America/New_York:20240105T090000\r\n"
+        "DTEND:20240105T150000Z\r\n"
+        "BEGIN:VALARM\r\nDESCRIPTION:Reminder\r\nEND:VALARM\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "SUMMARY:Holiday\r\n"
+        "DTSTART;VALUE=DATE:20240115\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+    cal_path = tmp_path / 'folded.ics'
+    cal_path.write_bytes(ics.encode('utf-8'))
+
+    meeting, holiday = iter_vevents(str(cal_path))
+
+    assert meeting['summary'] == 'Team Meeting, weekly'
+    assert meeting['description'] == 'Agenda\nfirst item and a long folded line'
+    assert meeting['dtstart'] == datetime(2024, 1, 5, 9, tzinfo=tz.gettz('America/New_York'))
+    assert meeting['dtend'] == datetime(2024, 1, 5, 15, tzinfo=timezone.utc)
+    assert holiday == {'summary': 'Holiday', 'dtstart': date(2024, 1, 15)}
+
+def test_iter_vevents_case_insensitive(tmp_path):
+    """Test that component delimiters match regardless of case and line endings."""
+    ics = (
+        "begin:vcalendar\n"
+        "begin:vevent\n"
+        "summary:Lower Case\n"
+        "dtstart:20240105T090000Z\n"
+        "Begin:Valarm\ndescription:Reminder\nEnd:Valarm\n"
+        "end:vevent\n"
+        "Begin:VEvent\r\n"
+        "SUMMARY:Mixed Case\r\n"
+        "End:VEvent\r\n"
+        "end:vcalendar\n"
+    )
+    cal_path = tmp_path / 'lower.ics'
+    cal_path.write_bytes(ics.encode('utf-8'))
+
+    assert list(iter_vevents(str(cal_path))) == [
+        {'summary': 'Lower Case', 'dtstart': datetime(2024, 1, 5, 9, tzinfo=timezone.utc)},
+        {'summary': 'Mixed Case'},
+    ]
+
+def test_vevents_parallel(tmp_path):
+    """Test that several files parsed in the process pool match single-file parses, in file order."""
+    paths = []
+    for name, summary, tzid in [('a', 'First File', 'America/New_York'), ('b', 'Second File', 'Europe/Riga')]:
+        ics = (
+            "BEGIN:VCALENDAR\r\n"
+            f"BEGIN:VEVENT\r\nSUMMARY:{summary}\r\n"
+            f"DTSTART;TZID={tzid}:20240105T090000\r\nDTEND:20240105T170000Z\r\nEND:VEVENT\r\n"
+            f"BEGIN:VEVENT\r\nSUMMARY:{summary} Holiday\r\nDTSTART;VALUE=DATE:20240115\r\nEND:VEVENT\r\n"
+            "END:VCALENDAR\r\n"
+        )
+        cal_path = tmp_path / f'{name}.ics'
+        cal_path.write_bytes(ics.encode('utf-8'))
+        paths.append(str(cal_path))
+
+    vevents = CalendarAnalyzer(paths).vevents
+
+    assert vevents == [CalendarAnalyzer([path]).vevents[0] for path in paths]
+    assert [events[0]['summary'] for events in vevents] == ['First File', 'Second File']
+    assert vevents[1][0]['dtstart'].tzinfo is ZoneInfo('Europe/Riga')
+
+def test_load_patterns(tmp_path):
+    """Test that pattern lines are compiled case-insensitively and duplicates share one regex."""
+    patterns_file = tmp_path / 'patterns.txt'
+    patterns_file.write_text("meetings:(?i)meeting|sync\nsyncs:meeting|sync\n\nnot a pattern\n", encoding='utf-8')
+
+    patterns = load_or_generate_patterns([], str(patterns_file))
+
+    assert list(patterns) == ['meetings', 'syncs']
+    assert patterns['meetings'] is patterns['syncs']
+    assert patterns['meetings'].pattern == 'meeting|sync'
+    assert patterns['meetings'].search('Team MEETING')
+
+def test_unmatched_events(tmp_path, timeframe, capsys):
+    """Test that unmatched events are kept on the analyzer instead of being printed."""
+    cal = Calendar()
+    cal.add('prodid', '-//Test Calendar//')
+    cal.add('version', '2.0')
+    for summary in ['Team Meeting', 'Dentist']:
+        event = Event()
+        event.add('summary', summary)
+        event.add('dtstart', datetime(2024, 3, 4, 10, tzinfo=tz.gettz('America/Los_Angeles')))
+        event.add('dtend', datetime(2024, 3, 4, 11, tzinfo=tz.gettz('America/Los_Angeles')))
+        cal.add_component(event)
+    cal_path = tmp_path / 'unmatched.ics'
+    cal_path.write_bytes(cal.to_ical())
+
+    test_analyzer = CalendarAnalyzer([str(cal_path)])
+    start_time, end_time = timeframe
+    results = test_analyzer.analyze_events(start_time, end_time, {'meetings': re.compile(r'meeting', re.IGNORECASE)})
+
+    assert capsys.readouterr().out == ""
+    assert [event.summary for event in results['meetings']] == ['Team Meeting']
+    assert [event.summary for event in test_analyzer.unmatched_events] == ['Dentist']
+    assert test_analyzer.format_unmatched_events() == (
+        "\nEvents that did not fit the patterns:\n"
+        "2024-03-04 10:00 | Dentist | 1:00:00\n"
+    )
+
+
+BOUNDARY_EVENTS = [
+    # (summary, DTSTART, DTEND); TZID times are America/Los_Angeles wall-clock
+    ("Budget Meeting", "DTSTART;TZID=America/Los_Angeles:20230215T100000", "DTEND;TZID=America/Los_Angeles:20230215T120000"),
+    ("New Year Meeting", "DTSTART:20240101T070000Z", "DTEND:20240101T080000Z"),
+    ("Leap Day Meeting", "DTSTART;TZID=America/Los_Angeles:20240229T230000", "DTEND;TZID=America/Los_Angeles:20240229T234500"),
+    ("Coffee", "DTSTART;TZID=America/Los_Angeles:20240301T001500", "DTEND;TZID=America/Los_Angeles:20240301T003500"),
+    ("DST Day Meeting", "DTSTART;TZID=America/Los_Angeles:20240310T100000", "DTEND;TZID=America/Los_Angeles:20240310T110000"),
+    ("Project Sync", "DTSTART;TZID=America/Los_Angeles:20240311T090000", "DTEND;TZID=America/Los_Angeles:20240311T103000"),
+    ("Offsite Meeting", "DTSTART;VALUE=DATE:20240312", "DTEND;VALUE=DATE:20240313"),
+]
+
+
+@pytest.fixture
+def boundary_results(tmp_path, timeframe):
+    """Analyze fixed events that sit on week, month, leap-February and DST boundaries."""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for uid, (summary, dtstart, dtend) in enumerate(BOUNDARY_EVENTS):
+        lines += ["BEGIN:VEVENT", f"UID:{uid}", f"SUMMARY:{summary}", dtstart, dtend, "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    cal_path = tmp_path / 'boundaries.ics'
+    cal_path.write_text("\r\n".join(lines) + "\r\n", encoding='utf-8')
+
+    test_analyzer = CalendarAnalyzer([str(cal_path)])
+    tz_info = tz.gettz('America/Los_Angeles')
+    patterns = {
+        'meetings': re.compile(r'meeting|sync', re.IGNORECASE),
+        'social': re.compile(r'coffee', re.IGNORECASE),
+        'none': re.compile(r'zzz', re.IGNORECASE),
+    }
+    results = test_analyzer.analyze_events(
+        datetime(2023, 1, 1, tzinfo=tz_info), datetime(2024, 12, 31, 23, 59, 59, tzinfo=tz_info), patterns
+    )
+    return test_analyzer, results
+
+def test_boundary_day_stats(boundary_results):
+    test_analyzer, results = boundary_results
+    distribution = test_analyzer.get_day_stats(results)
+
+    empty = {'count': 0, 'total_hours': 0.0, 'avg_hours': 0.0}
+    assert distribution['meetings'] == {
+        'Monday': {'count': 1, 'total_hours': 1.5, 'avg_hours': 1.5},
+        'Tuesday': {'count': 1, 'total_hours': 0.0, 'avg_hours': 0.0},
+        'Wednesday': {'count': 1, 'total_hours': 2.0, 'avg_hours': 2.0},
+        'Thursday': {'count': 1, 'total_hours': 0.75, 'avg_hours': 0.75},
+        'Friday': empty,
+        'Saturday': empty,
+        # 2023-12-31 23:00 local (07:00 UTC on New Year's Day) and the DST-change Sunday
+        'Sunday': {'count': 2, 'total_hours': 2.0, 'avg_hours': 1.0},
+    }
+    # Hours match duration.total_seconds() / 3600 exactly
+    assert distribution['social']['Friday'] == {'count': 1, 'total_hours': 1200 / 3600, 'avg_hours': 1200 / 3600}
+    assert all(stats == empty for stats in distribution['none'].values())
+
+def test_boundary_time_spent(boundary_results):
+    test_analyzer, results = boundary_results
+    assert test_analyzer.get_time_spent(results) == {
+        'meetings': timedelta(hours=6, minutes=15),
+        'social': timedelta(minutes=20),
+        'none': timedelta(0),
+    }
+
+def test_stats_share_frame(boundary_results):
+    """Test that stats computed from one prebuilt frame match stats that build their own."""
+    test_analyzer, results = boundary_results
+    frame = test_analyzer.events_frame(results)
+    assert test_analyzer.get_day_stats(results, frame) == test_analyzer.get_day_stats(results)
+    assert test_analyzer.get_weekly_stats(results, frame) == test_analyzer.get_weekly_stats(results)
+    assert test_analyzer.get_monthly_stats(results, frame) == test_analyzer.get_monthly_stats(results)
+
+def test_stats_accept_plain_tuples(boundary_results):
+    """Test that hand-built (start, summary, duration) tuples give the same stats as analyze_events results."""
+    test_analyzer, results = boundary_results
+    plain = {pattern: [tuple(event) for event in events] for pattern, events in results.items()}
+    assert type(plain['meetings'][0]) is tuple
+    assert test_analyzer.get_day_stats(plain) == test_analyzer.get_day_stats(results)
+    assert test_analyzer.get_time_spent(plain) == test_analyzer.get_time_spent(results)
+    assert test_analyzer.get_weekly_stats(plain) == test_analyzer.get_weekly_stats(results)
+    assert test_analyzer.get_monthly_stats(plain) == test_analyzer.get_monthly_stats(results)
+
+def test_stats_follow_in_place_edits(boundary_results):
+    """Test that stats reflect same-length edits and ignore changes made to a returned frame."""
+    test_analyzer, results = boundary_results
+    frame = test_analyzer.events_frame(results)
+    frame['hours'] = 100.0
+    assert test_analyzer.get_time_spent(results)['social'] == timedelta(minutes=20)
+
+    coffee = results['social'][0]
+    results['social'][0] = coffee._replace(duration=timedelta(hours=2))
+    assert test_analyzer.get_time_spent(results)['social'] == timedelta(hours=2)
+    assert test_analyzer.get_day_stats(results)['social']['Friday']['total_hours'] == 2.0
+
+def test_boundary_weekly_stats(boundary_results):
+    test_analyzer, results = boundary_results
+    weekly_stats = test_analyzer.get_weekly_stats(results)
+
+    # Keys are the local Monday of each week, formatted YYYY-MM-DD
+    assert weekly_stats['meetings'] == {
+        '2023-02-13': {'total_hours': 2.0, 'avg_hours': 2.0 / 7},
+        '2023-12-25': {'total_hours': 1.0, 'avg_hours': 1.0 / 7},
+        '2024-02-26': {'total_hours': 0.75, 'avg_hours': 0.75 / 7},
+        '2024-03-04': {'total_hours': 1.0, 'avg_hours': 1.0 / 7},
+        '2024-03-11': {'total_hours': 1.5, 'avg_hours': 1.5 / 7},
+    }
+    assert weekly_stats['social'] == {'2024-02-26': {'total_hours': 1200 / 3600, 'avg_hours': 1200 / 3600 / 7}}
+    assert weekly_stats['none'] == {}
+
+def test_boundary_monthly_stats(boundary_results):
+    test_analyzer, results = boundary_results
+    monthly_stats = test_analyzer.get_monthly_stats(results)
+
+    assert monthly_stats['meetings'] == {
+        '2023-02': {'total_hours': 2.0, 'avg_hours': 2.0 / (28 / 7.0), 'event_count': 1},
+        '2023-12': {'total_hours': 1.0, 'avg_hours': 1.0 / (31 / 7.0), 'event_count': 1},
+        '2024-02': {'total_hours': 0.75, 'avg_hours': 0.75 / (29 / 7.0), 'event_count': 1},
+        '2024-03': {'total_hours': 2.5, 'avg_hours': 2.5 / (31 / 7.0), 'event_count': 3},
+    }
+    assert monthly_stats['social'] == {
+        '2024-03': {'total_hours': 1200 / 3600, 'avg_hours': 1200 / 3600 / (31 / 7.0), 'event_count': 1},
+    }
+    assert monthly_stats['none'] == {}
+
+def test_days_in_month():
+    assert all(
+        _days_in_month(year, month) == calendar.monthrange(year, month)[1]
+        for year in range(1600, 2500)
+        for month in range(1, 13)
+    )
+
+def test_dst_crossing_duration(tmp_path, timeframe):
+    """Test that events spanning a DST change last their elapsed time, however they are written."""
+    ics = (
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Spring Forward TZID\r\n"
+        "DTSTART;TZID=America/Los_Angeles:20240310T013000\r\n"
+        "DTEND;TZID=America/Los_Angeles:20240310T033000\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Spring Forward UTC\r\n"
+        "DTSTART:20240310T093000Z\r\nDTEND:20240310T103000Z\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Fall Back TZID\r\n"
+        "DTSTART;TZID=America/Los_Angeles:20241103T003000\r\n"
+        "DTEND;TZID=America/Los_Angeles:20241103T023000\r\nEND:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+    cal_path = tmp_path / 'dst.ics'
+    cal_path.write_bytes(ics.encode('utf-8'))
+
+    test_analyzer = CalendarAnalyzer([str(cal_path)])
+    start_time, end_time = timeframe
+    results = test_analyzer.analyze_events(start_time, end_time, {'all': re.compile(r'.')})
+
+    durations = {event.summary: event.duration for event in results['all']}
+    assert durations == {
+        'Spring Forward TZID': timedelta(hours=1),
+        'Spring Forward UTC': timedelta(hours=1),
+        'Fall Back TZID': timedelta(hours=3),
+    }
+
+def test_daily_hours_rounding(tmp_path, timeframe):
+    """Test that the Excel day totals round half-way hours the way Python's round does."""
+    ics = (
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Short Call\r\n"
+        "DTSTART:20240304T170000Z\r\nDTEND:20240304T170300Z\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Standup Call\r\n"
+        "DTSTART:20240305T170000Z\r\nDTEND:20240305T172100Z\r\nEND:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+    cal_path = tmp_path / 'rounding.ics'
+    cal_path.write_bytes(ics.encode('utf-8'))
+
+    test_analyzer = CalendarAnalyzer([str(cal_path)])
+    start_time, end_time = timeframe
+    patterns = {'calls': re.compile(r'call', re.IGNORECASE), 'none': re.compile(r'xyz')}
+    results = test_analyzer.analyze_events(start_time, end_time, patterns)
+    days = [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)]
+
+    # 3 minutes is 0.05 h and 21 minutes is 0.35 h; numpy would round them to 0.0 and 0.4
+    assert _daily_hours(test_analyzer.events_frame(results), days) == [[0.1, 0.3, None], [None, None, None]]